@@ -5,9 +5,11 @@ const AdminPanel = () => {
   const [tab, setTab] = useState('users');
   const [users, setUsers] = useState([]);
   const [files, setFiles] = useState([]);
+  const [filesCursor, setFilesCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [quotaEdit, setQuotaEdit] = useState({});
+  const [queueStats, setQueueStats] = useState(null);
 
   const fetchUsers = async () => {
     setLoading(true);
@@ -21,11 +23,12 @@ const AdminPanel = () => {
     }
   };
 
-  const fetchFiles = async () => {
+  const fetchFiles = async (cursor = null) => {
     setLoading(true);
     try {
-      const res = await axios.get('/api/admin/files');
-      setFiles(res.data.files);
+      const res = await axios.get('/api/admin/files', { params: cursor ? { cursor } : {} });
+      setFiles(prev => cursor ? [...prev, ...res.data.files] : res.data.files);
+      setFilesCursor(res.data.next_cursor);
     } catch (err) {
       setError('获取文件失败');
     } finally {
@@ -33,9 +36,22 @@ const AdminPanel = () => {
     }
   };
 
+  const fetchQueueStats = async () => {
+    setLoading(true);
+    try {
+      const res = await axios.get('/api/admin/downloads/queue');
+      setQueueStats(res.data);
+    } catch (err) {
+      setError('获取下载队列失败');
+    } finally {
+      setLoading(false);
+    }
+  };
+
   useEffect(() => {
     if (tab === 'users') fetchUsers();
     if (tab === 'files') fetchFiles();
+    if (tab === 'queue') fetchQueueStats();
     // eslint-disable-next-line
   }, [tab]);
 
@@ -68,6 +84,7 @@ const AdminPanel = () => {
       <div className="admin-tabs mb-3">
         <button className={tab === 'users' ? 'btn btn-primary' : 'btn'} onClick={() => setTab('users')}>用户管理</button>
         <button className={tab === 'files' ? 'btn btn-primary' : 'btn'} onClick={() => setTab('files')}>文件管理</button>
+        <button className={tab === 'queue' ? 'btn btn-primary' : 'btn'} onClick={() => setTab('queue')}>下载队列</button>
       </div>
       {error && <div className="error-message">{error}</div>}
       {tab === 'users' && (
@@ -111,6 +128,29 @@ const AdminPanel = () => {
           </table>
         </div>
       )}
+      {tab === 'queue' && queueStats && (
+        <div className="admin-queue">
+          <p>服务进程: {queueStats.processes}，工作线程: {queueStats.workers}，执行中: {queueStats.running}，排队中: {queueStats.queued}</p>
+          <p>最久排队: {queueStats.oldest_wait.toFixed(1)} 秒，近期平均等待: {queueStats.avg_wait.toFixed(1)} 秒，近期最长等待: {queueStats.max_wait.toFixed(1)} 秒</p>
+          <table className="admin-table">
+            <thead>
+              <tr>
+                <th>用户ID</th>
+                <th>排队任务数</th>
+              </tr>
+            </thead>
+            <tbody>
+              {queueStats.queued_by_user.map(q => (
+                <tr key={q.user_id}>
+                  <td>{q.user_id}</td>
+                  <td>{q.queued}</td>
+                </tr>
+              ))}
+            </tbody>
+          </table>
+          <button className="btn btn-secondary" onClick={fetchQueueStats}>刷新</button>
+        </div>
+      )}
       {tab === 'files' && (
         <div className="admin-files">
           <table className="admin-table">
@@ -137,6 +177,11 @@ const AdminPanel = () => {
               ))}
             </tbody>
           </table>
+          {filesCursor && (
+            <button className="btn btn-secondary" disabled={loading} onClick={() => fetchFiles(filesCursor)}>
+              {loading ? '加载中...' : '加载更多'}
+            </button>
+          )}
         </div>
       )}
     </div>
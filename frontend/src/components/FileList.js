@@ -1,13 +1,30 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 
-const FileList = ({ files, onDelete, formatBytes }) => {
+const FileList = ({ files, onDelete, formatBytes, hasMore, loadingMore, onLoadMore }) => {
   const [shareCode, setShareCode] = useState({});
   const [loading, setLoading] = useState({});
   const [showShareModal, setShowShareModal] = useState({});
   const [sharePassword, setSharePassword] = useState({});
   const [showPreviewModal, setShowPreviewModal] = useState({});
   const [previewUrl, setPreviewUrl] = useState({});
+  const [selected, setSelected] = useState({});
+  const [batchLoading, setBatchLoading] = useState(false);
+  const sentinelRef = useRef(null);
+
+  // 滚动到列表底部时自动加载下一页
+  useEffect(() => {
+    if (!hasMore || !onLoadMore || !sentinelRef.current) {
+      return undefined;
+    }
+    const observer = new IntersectionObserver((entries) => {
+      if (entries[0].isIntersecting) {
+        onLoadMore();
+      }
+    }, { rootMargin: '300px' });
+    observer.observe(sentinelRef.current);
+    return () => observer.disconnect();
+  }, [hasMore, onLoadMore, files.length]);
 
   const handleDownload = async (fileId) => {
     try {
@@ -49,7 +66,24 @@ const FileList = ({ files, onDelete, formatBytes }) => {
     setShowShareModal(prev => ({ ...prev, [fileId]: true }));
   };
 
-  const handlePreview = async (fileId) => {
+  const handlePreview = async (fileId, filename) => {
+    // 视频直接使用URL播放，浏览器按Range分段请求，可随意拖动进度
+    if (getFileType(filename) === 'video') {
+      // URL中只放限定该文件预览地址的短期token，不暴露登录token
+      const path = `/api/files/${fileId}/preview`;
+      try {
+        const response = await axios.post('/api/url_token', { path }, {
+          headers: { Authorization: `Bearer ${localStorage.getItem('token')}` }
+        });
+        const url = `${axios.defaults.baseURL || ''}${path}?token=${encodeURIComponent(response.data.token)}`;
+        setPreviewUrl(prev => ({ ...prev, [fileId]: url }));
+        setShowPreviewModal(prev => ({ ...prev, [fileId]: true }));
+      } catch (error) {
+        alert('预览失败');
+      }
+      return;
+    }
+
     try {
       const response = await axios.get(`/api/files/${fileId}/preview`, {
         responseType: 'blob'
@@ -64,7 +98,7 @@ const FileList = ({ files, onDelete, formatBytes }) => {
   };
 
   const closePreview = (fileId) => {
-    if (previewUrl[fileId]) {
+    if (previewUrl[fileId] && previewUrl[fileId].startsWith('blob:')) {
       window.URL.revokeObjectURL(previewUrl[fileId]);
     }
     setShowPreviewModal(prev => ({ ...prev, [fileId]: false }));
@@ -94,6 +128,57 @@ const FileList = ({ files, onDelete, formatBytes }) => {
     }
   };
 
+  const selectedIds = files.filter(file => selected[file.id]).map(file => file.id);
+
+  const toggleSelect = (fileId) => {
+    setSelected(prev => ({ ...prev, [fileId]: !prev[fileId] }));
+  };
+
+  const toggleSelectAll = () => {
+    if (selectedIds.length === files.length) {
+      setSelected({});
+    } else {
+      setSelected(Object.fromEntries(files.map(file => [file.id, true])));
+    }
+  };
+
+  // 批量操作一次请求处理所有选中的文件
+  const handleBatchDelete = async () => {
+    if (!window.confirm(`确定要删除选中的${selectedIds.length}个文件吗？`)) {
+      return;
+    }
+
+    setBatchLoading(true);
+    try {
+      await axios.post('/api/files/batch_delete', { file_ids: selectedIds });
+      setSelected({});
+      onDelete();
+    } catch (error) {
+      alert(error.response?.data?.error || '批量删除失败');
+    } finally {
+      setBatchLoading(false);
+    }
+  };
+
+  const handleBatchShare = async () => {
+    const password = window.prompt('分享密码（可选，留空表示无密码）', '');
+    if (password === null) {
+      return;
+    }
+
+    setBatchLoading(true);
+    try {
+      const response = await axios.post('/api/files/batch_share', { file_ids: selectedIds, password });
+      const codes = Object.fromEntries(response.data.shares.map(share => [share.file_id, share.share_code]));
+      setShareCode(prev => ({ ...prev, ...codes }));
+      setSelected({});
+    } catch (error) {
+      alert(error.response?.data?.error || '批量分享失败');
+    } finally {
+      setBatchLoading(false);
+    }
+  };
+
   const copyShareLink = (shareCode) => {
     const shareUrl = `${window.location.origin}/share/${shareCode}`;
     navigator.clipboard.writeText(shareUrl).then(() => {
@@ -107,12 +192,44 @@ const FileList = ({ files, onDelete, formatBytes }) => {
 
   return (
     <div>
+      <div className="file-batch-toolbar">
+        <label>
+          <input
+            type="checkbox"
+            checked={selectedIds.length === files.length}
+            onChange={toggleSelectAll}
+          />
+          全选
+        </label>
+        <span>已选 {selectedIds.length} 个</span>
+        <button
+          className="btn btn-success"
+          onClick={handleBatchShare}
+          disabled={!selectedIds.length || batchLoading}
+        >
+          批量分享
+        </button>
+        <button
+          className="btn btn-danger"
+          onClick={handleBatchDelete}
+          disabled={!selectedIds.length || batchLoading}
+        >
+          批量删除
+        </button>
+      </div>
       {files.map(file => (
         <div key={file.id} className="file-item">
+          <input
+            type="checkbox"
+            className="file-select"
+            checked={!!selected[file.id]}
+            onChange={() => toggleSelect(file.id)}
+          />
           <div className="file-info">
             <h4>{file.filename}</h4>
             <p>大小: {formatBytes(file.original_size || file.file_size)}</p>
             <p>上传时间: {new Date(file.created_at).toLocaleString()}</p>
+            {file.status === 'pending' && <p style={{ color: '#17a2b8' }}>后台压缩中...</p>}
             {shareCode[file.id] && (
               <div style={{ marginTop: '10px' }}>
                 <p>分享码: <strong>{shareCode[file.id]}</strong></p>
@@ -130,7 +247,7 @@ const FileList = ({ files, onDelete, formatBytes }) => {
             {getFileType(file.filename) === 'video' && (
               <button 
                 className="btn btn-info" 
-                onClick={() => handlePreview(file.id)}
+                onClick={() => handlePreview(file.id, file.filename)}
               >
                 预览
               </button>
@@ -138,7 +255,7 @@ const FileList = ({ files, onDelete, formatBytes }) => {
             {getFileType(file.filename) === 'text' && (
               <button 
                 className="btn btn-info" 
-                onClick={() => handlePreview(file.id)}
+                onClick={() => handlePreview(file.id, file.filename)}
               >
                 预览
               </button>
@@ -234,6 +351,11 @@ const FileList = ({ files, onDelete, formatBytes }) => {
           )}
         </div>
       ))}
+      {hasMore && (
+        <div ref={sentinelRef} style={{ padding: '10px', textAlign: 'center', color: '#666' }}>
+          {loadingMore ? '加载中...' : '下拉加载更多'}
+        </div>
+      )}
     </div>
   );
 };
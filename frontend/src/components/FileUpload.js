@@ -1,34 +1,140 @@
 import React, { useState, useCallback } from 'react';
 import { useDropzone } from 'react-dropzone';
 import axios from 'axios';
+import { Sha256 } from '../sha256';
+
+const MAX_RETRIES = 5;
+// 秒传前要先读完整个文件计算哈希，大文件直接上传比先算哈希更划算
+const INSTANT_HASH_LIMIT = 128 * 1024 * 1024;
+const HASH_SLICE_SIZE = 4 * 1024 * 1024;
+
+const authHeaders = () => ({ Authorization: `Bearer ${localStorage.getItem('token')}` });
+
+// 同一文件刷新页面后可继续之前的上传任务
+const resumeKey = (file) => `upload:${file.name}:${file.size}:${file.lastModified}`;
+
+// 按片读取计算哈希，内存中最多只有一片数据
+const sha256Hex = async (blob) => {
+  const hash = new Sha256();
+  for (let offset = 0; offset < blob.size; offset += HASH_SLICE_SIZE) {
+    const slice = await blob.slice(offset, offset + HASH_SLICE_SIZE).arrayBuffer();
+    hash.update(new Uint8Array(slice));
+  }
+  return hash.hex();
+};
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
 
 const FileUpload = ({ onUpload }) => {
   const [uploading, setUploading] = useState(false);
+  const [progress, setProgress] = useState(0);
   const [error, setError] = useState('');
 
+  const startUpload = async (file) => {
+    const key = resumeKey(file);
+    const savedId = localStorage.getItem(key);
+
+    if (savedId) {
+      try {
+        const status = await axios.get(`/api/upload/${savedId}`, { headers: authHeaders() });
+        return { uploadId: savedId, offset: status.data.offset, chunkSize: 8 * 1024 * 1024 };
+      } catch (error) {
+        localStorage.removeItem(key);
+      }
+    }
+
+    const init = await axios.post('/api/upload/init', {
+      filename: file.name,
+      size: file.size
+    }, { headers: authHeaders() });
+    localStorage.setItem(key, init.data.upload_id);
+    return { uploadId: init.data.upload_id, offset: init.data.offset, chunkSize: init.data.chunk_size };
+  };
+
+  // 秒传：服务端已有相同内容时回答它抽查的一段内容的哈希即可完成，返回null表示需要正常上传
+  const tryInstantUpload = async (file) => {
+    if (file.size > INSTANT_HASH_LIMIT) {
+      return null;
+    }
+    try {
+      const response = await axios.post('/api/upload/instant', {
+        filename: file.name,
+        size: file.size,
+        sha256: await sha256Hex(file)
+      }, { headers: authHeaders() });
+      const { challenge, offset, length } = response.data;
+      if (!challenge) {
+        return null;
+      }
+      const proof = await axios.post(`/api/upload/instant/${challenge}`, {
+        proof: await sha256Hex(file.slice(offset, offset + length))
+      }, { headers: authHeaders() });
+      return proof.data.instant ? proof.data : null;
+    } catch (error) {
+      return null;
+    }
+  };
+
+  const uploadChunked = async (file) => {
+    let { uploadId, offset, chunkSize } = await startUpload(file);
+    let retries = 0;
+
+    while (offset < file.size) {
+      const chunk = file.slice(offset, offset + chunkSize);
+      try {
+        const response = await axios.put(`/api/upload/${uploadId}?offset=${offset}`, chunk, {
+          headers: { ...authHeaders(), 'Content-Type': 'application/octet-stream' }
+        });
+        offset = response.data.offset;
+        retries = 0;
+        setProgress(Math.floor((offset / file.size) * 100));
+      } catch (error) {
+        if (error.response && error.response.status === 409) {
+          // 服务端偏移量与本地不一致，按服务端为准续传
+          offset = error.response.data.offset;
+          continue;
+        }
+        if (error.response && error.response.status === 423) {
+          // 之前超时的请求仍在写入，等它结束后按服务端偏移量续传
+          await sleep(1000);
+          offset = error.response.data.offset;
+          continue;
+        }
+        if (++retries > MAX_RETRIES) {
+          throw error;
+        }
+        await sleep(1000 * retries);
+        try {
+          const status = await axios.get(`/api/upload/${uploadId}`, { headers: authHeaders() });
+          offset = status.data.offset;
+        } catch (statusError) {
+          // 网络仍不可用，下次重试时再查询
+        }
+      }
+    }
+
+    const response = await axios.post(`/api/upload/${uploadId}/complete`, {}, { headers: authHeaders() });
+    localStorage.removeItem(resumeKey(file));
+    return response.data;
+  };
+
   const onDrop = useCallback(async (acceptedFiles) => {
     setError('');
     setUploading(true);
 
     for (const file of acceptedFiles) {
+      setProgress(0);
       try {
-        const formData = new FormData();
-        formData.append('file', file);
-
-        const response = await axios.post('/api/upload', formData, {
-          headers: {
-            'Content-Type': 'multipart/form-data',
-          },
-        });
-
-        onUpload(response.data.file);
+        const result = (await tryInstantUpload(file)) || (await uploadChunked(file));
+        onUpload(result);
       } catch (error) {
-        setError(error.response?.data?.error || '文件上传失败');
+        setError(error.response?.data?.error || '文件上传失败，重新选择该文件可继续上传');
         break;
       }
     }
 
     setUploading(false);
+    // eslint-disable-next-line
   }, [onUpload]);
 
   const { getRootProps, getInputProps, isDragActive } = useDropzone({
@@ -45,7 +151,7 @@ const FileUpload = ({ onUpload }) => {
       >
         <input {...getInputProps()} />
         {uploading ? (
-          <p>上传中...</p>
+          <p>上传中... {progress}%</p>
         ) : isDragActive ? (
           <p>将文件拖放到这里...</p>
         ) : (
@@ -61,4 +167,4 @@ const FileUpload = ({ onUpload }) => {
   );
 };
 
-export default FileUpload; 
\ No newline at end of file
+export default FileUpload;
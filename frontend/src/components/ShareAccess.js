@@ -104,6 +104,26 @@ const ShareAccess = () => {
   };
 
   const handlePreview = async () => {
+    // 视频直接使用URL播放，浏览器按Range分段请求，可随意拖动进度；
+    // 密码通过POST换取只能访问该预览地址的短期token，不放进URL
+    if (getFileType(fileInfo.filename) === 'video') {
+      try {
+        const response = await axios.post(`/api/share/${shareCode}/url_token`, {
+          password: password
+        });
+        const token = encodeURIComponent(response.data.token);
+        setPreviewUrl(`${axios.defaults.baseURL || ''}/api/share/${shareCode}/preview?token=${token}`);
+        setShowPreviewModal(true);
+      } catch (error) {
+        if (error.response?.status === 401) {
+          alert('密码错误或需要密码');
+        } else {
+          alert('预览失败');
+        }
+      }
+      return;
+    }
+
     try {
       const response = await axios.post(`/api/share/${shareCode}/preview`, {
         password: password
@@ -124,7 +144,7 @@ const ShareAccess = () => {
   };
 
   const closePreview = () => {
-    if (previewUrl) {
+    if (previewUrl && previewUrl.startsWith('blob:')) {
       window.URL.revokeObjectURL(previewUrl);
     }
     setShowPreviewModal(false);
@@ -0,0 +1,29 @@
+# gunicorn配置：gunicorn -c gunicorn.conf.py wsgi:app
+# 进程数和线程数可通过环境变量调整，例如 WEB_WORKERS=4 WEB_THREADS=64
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_WORKERS', multiprocessing.cpu_count()))
+# SSE进度推送和大文件下载是长连接，使用线程worker，每个连接占用一个线程。
+# 每个打开的页面保持一个SSE连接，应用限制每个进程最多WEB_THREADS-16个SSE连接（SSE_MAX_STREAMS），
+# 其余线程留给普通请求；同时在线的页面较多时增大WEB_THREADS或WEB_WORKERS
+worker_class = 'gthread'
+threads = int(os.environ.get('WEB_THREADS', 64))
+timeout = int(os.environ.get('WEB_TIMEOUT', 120))
+graceful_timeout = 30
+accesslog = '-'
+# 访问日志只记录路径（%(U)s），不记录查询参数，视频、SSE地址中的token不会写进日志
+access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(m)s %(U)s %(H)s" %(s)s %(b)s "%(f)s" "%(a)s"'
+
+
+def on_starting(server):
+    """主进程启动时只创建一次数据库表并执行迁移，而不是每个worker各做一次"""
+    from app import init_db
+    init_db()
+
+
+def post_worker_init(worker):
+    """每个worker各自运行下载调度、压缩队列和周期维护；中断的任务由心跳过期检测接管，不会被多个worker重复恢复"""
+    from app import start_background_services
+    start_background_services()
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import axios from 'axios';
 import FileUpload from './FileUpload';
 import FileList from './FileList';
@@ -11,8 +11,14 @@ import DeleteAccountModal from './DeleteAccountModal';
 import AppDownloadModal from './AppDownloadModal';
 import AdminPanel from './AdminPanel';
 
+const FILE_PAGE_SIZE = 100;
+const FILE_PAGE_MAX = 500; // 服务端单页上限
+
 const Dashboard = ({ user, onLogout }) => {
   const [files, setFiles] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [fileQuery, setFileQuery] = useState({ sort: 'created_at', order: 'desc', q: '' });
   const [storageInfo, setStorageInfo] = useState({ used: 0, limit: 10 * 1024 * 1024 * 1024 });
   const [selected, setSelected] = useState('files');
   const [showProfile, setShowProfile] = useState(false);
@@ -22,38 +28,8 @@ const Dashboard = ({ user, onLogout }) => {
   const [showAppDownload, setShowAppDownload] = useState(false);
   const [downloads, setDownloads] = useState([]);
   const [uploadHistory, setUploadHistory] = useState([]);
-  const [activeDownloads, setActiveDownloads] = useState(new Set());
-
-  useEffect(() => {
-    fetchFiles();
-    fetchStorageInfo();
-    fetchDownloads();
-  }, []);
 
-  // 轮询下载进度
-  useEffect(() => {
-    const interval = setInterval(() => {
-      if (activeDownloads.size > 0) {
-        fetchDownloads();
-      }
-    }, 2000); // 每2秒更新一次
-
-    return () => clearInterval(interval);
-  }, [activeDownloads]);
-
-  const fetchFiles = async () => {
-    try {
-      const token = localStorage.getItem('token');
-      const response = await axios.get('/api/files', {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      setFiles(response.data.files);
-    } catch (error) {
-      console.error('获取文件列表失败:', error);
-    }
-  };
-
-  const fetchStorageInfo = async () => {
+  const fetchStorageInfo = useCallback(async () => {
     try {
       const token = localStorage.getItem('token');
       const response = await axios.get('/api/profile', {
@@ -76,29 +52,200 @@ const Dashboard = ({ user, onLogout }) => {
         limit: 10 * 1024 * 1024 * 1024
       });
     }
-  };
+  }, []);
 
-  const fetchDownloads = async () => {
+  const fetchDownloads = useCallback(async () => {
     try {
       const token = localStorage.getItem('token');
       const response = await axios.get('/api/downloads', {
         headers: { Authorization: `Bearer ${token}` }
       });
       setDownloads(response.data.downloads);
-      
-      // 更新活跃下载任务
-      const active = new Set();
-      response.data.downloads.forEach(download => {
-        if (download.status === 'downloading' || download.status === 'starting') {
-          active.add(download.id);
-        }
-      });
-      setActiveDownloads(active);
     } catch (error) {
       console.error('获取下载列表失败:', error);
     }
+  }, []);
+
+  // cursor为空时重新加载第一页，否则追加下一页
+  const fetchFiles = useCallback(async (cursor = null, limit = FILE_PAGE_SIZE) => {
+    try {
+      const token = localStorage.getItem('token');
+      const params = { ...fileQuery, limit };
+      if (cursor) {
+        params.cursor = cursor;
+      }
+      const response = await axios.get('/api/files', {
+        headers: { Authorization: `Bearer ${token}` },
+        params
+      });
+      setFiles(prev => cursor ? [...prev, ...response.data.files] : response.data.files);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('获取文件列表失败:', error);
+    }
+  }, [fileQuery]);
+
+  // SSE回调只在连接建立时注册一次，通过ref调用最新的fetchFiles；
+  // 刷新时沿用当前的排序和搜索条件，并重新加载已经展开的页数
+  const fetchFilesRef = useRef(fetchFiles);
+  const loadedCountRef = useRef(0);
+  useEffect(() => {
+    fetchFilesRef.current = fetchFiles;
+  }, [fetchFiles]);
+  useEffect(() => {
+    loadedCountRef.current = files.length;
+  }, [files]);
+
+  const refreshFiles = useCallback(() => {
+    const limit = Math.min(Math.max(FILE_PAGE_SIZE, loadedCountRef.current), FILE_PAGE_MAX);
+    fetchFilesRef.current(null, limit);
+  }, []);
+
+  useEffect(() => {
+    fetchStorageInfo();
+    fetchDownloads();
+  }, [fetchStorageInfo, fetchDownloads]);
+
+  // 排序或搜索条件变化时（fetchFiles随fileQuery更新）从第一页重新加载
+  useEffect(() => {
+    fetchFiles();
+  }, [fetchFiles]);
+
+  // 通过SSE接收服务端推送的下载/压缩进度，替代定时轮询
+  useEffect(() => {
+    if (!window.EventSource) {
+      const interval = setInterval(fetchDownloads, 5000);
+      return () => clearInterval(interval);
+    }
+
+    let source = null;
+    let retryTimer = null;
+    let pollTimer = null;
+    let retryDelay = 3000;
+    let stopped = false;
+
+    // SSE不可用（如服务端连接数已满返回503）时改为轮询，并逐渐拉长重连间隔
+    const fallback = (delay) => {
+      if (stopped) {
+        return;
+      }
+      fetchDownloads();
+      if (!pollTimer) {
+        pollTimer = setInterval(fetchDownloads, 5000);
+      }
+      retryTimer = setTimeout(connect, delay);
+    };
+
+    const handleMessage = (e) => {
+      const download = JSON.parse(e.data);
+      setDownloads(prev => {
+        const index = prev.findIndex(d => d.id === download.id);
+        if (index === -1) {
+          return [download, ...prev];
+        }
+        const next = [...prev];
+        next[index] = download;
+        return next;
+      });
+      if (download.status === 'completed') {
+        refreshFiles();
+        fetchStorageInfo();
+      }
+    };
+
+    // URL中只放限定SSE地址的短期token；连接断开后浏览器用原地址重连会因token过期失败，
+    // 此时重新申请token再连接
+    const connect = async () => {
+      try {
+        const path = '/api/downloads/stream';
+        const response = await axios.post('/api/url_token', { path }, {
+          headers: { Authorization: `Bearer ${localStorage.getItem('token')}` }
+        });
+        if (stopped) {
+          return;
+        }
+        source = new EventSource(`${axios.defaults.baseURL || ''}${path}?token=${encodeURIComponent(response.data.token)}`);
+        source.addEventListener('snapshot', (e) => {
+          setDownloads(JSON.parse(e.data));
+        });
+        source.onopen = () => {
+          retryDelay = 3000;
+          clearInterval(pollTimer);
+          pollTimer = null;
+        };
+        source.onmessage = handleMessage;
+        source.onerror = () => {
+          if (source.readyState === EventSource.CLOSED) {
+            fallback(retryDelay);
+            retryDelay = Math.min(retryDelay * 2, 60000);
+          }
+        };
+      } catch (error) {
+        fallback(10000);
+      }
+    };
+    connect();
+
+    return () => {
+      stopped = true;
+      clearTimeout(retryTimer);
+      clearInterval(pollTimer);
+      if (source) {
+        source.close();
+      }
+    };
+  }, [fetchDownloads, fetchStorageInfo, refreshFiles]);
+
+  const loadMoreFiles = async () => {
+    if (!nextCursor || loadingMore) {
+      return;
+    }
+    setLoadingMore(true);
+    await fetchFiles(nextCursor);
+    setLoadingMore(false);
   };
 
+  const renderFileList = () => (
+    <div className="files-section">
+      <h2>文件列表</h2>
+      <div className="file-toolbar" style={{ display: 'flex', gap: '10px', marginBottom: '10px' }}>
+        <input
+          type="text"
+          className="form-control"
+          placeholder="搜索文件名，回车确认"
+          defaultValue={fileQuery.q}
+          onKeyPress={(e) => {
+            if (e.key === 'Enter') {
+              setFileQuery(prev => ({ ...prev, q: e.target.value.trim() }));
+            }
+          }}
+        />
+        <select
+          className="form-control"
+          value={`${fileQuery.sort}:${fileQuery.order}`}
+          onChange={(e) => {
+            const [sort, order] = e.target.value.split(':');
+            setFileQuery(prev => ({ ...prev, sort, order }));
+          }}
+        >
+          <option value="created_at:desc">最新上传</option>
+          <option value="created_at:asc">最早上传</option>
+          <option value="filename:asc">文件名 A-Z</option>
+          <option value="filename:desc">文件名 Z-A</option>
+          <option value="file_size:desc">大小从大到小</option>
+          <option value="file_size:asc">大小从小到大</option>
+        </select>
+      </div>
+      <FileList
+        files={files}
+        onDelete={() => fetchFiles()}
+        hasMore={!!nextCursor}
+        loadingMore={loadingMore}
+        onLoadMore={loadMoreFiles}
+      />
+    </div>
+  );
+
   const handleFileUpload = async (file, type = 'local') => {
     try {
       const token = localStorage.getItem('token');
@@ -130,11 +277,6 @@ const Dashboard = ({ user, onLogout }) => {
         download_id: response.data.download_id
       }, ...prev]);
 
-      // 如果是种子或ed2k下载，添加到活跃下载
-      if (response.data.download_id) {
-        setActiveDownloads(prev => new Set(prev).add(response.data.download_id));
-      }
-
       fetchFiles();
       fetchStorageInfo();
     } catch (error) {
@@ -149,6 +291,34 @@ const Dashboard = ({ user, onLogout }) => {
     }
   };
 
+  // 本地文件由FileUpload分块上传完成后回调
+  const handleLocalUploaded = (result) => {
+    setUploadHistory(prev => [{
+      id: Date.now(),
+      filename: result.filename,
+      status: 'success',
+      timestamp: new Date().toLocaleString(),
+      download_id: result.download_id
+    }, ...prev]);
+
+    fetchFiles();
+    fetchStorageInfo();
+  };
+
+  const handleCancelDownload = async (download) => {
+    try {
+      const token = localStorage.getItem('token');
+      await axios.delete(`/api/downloads/${download.id}`, {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      if (['completed', 'error', 'cancelled'].includes(download.status)) {
+        setDownloads(prev => prev.filter(d => d.id !== download.id));
+      }
+    } catch (error) {
+      alert(error.response?.data?.error || '操作失败');
+    }
+  };
+
   const handleTorrentUpload = async (file) => {
     const confirmed = window.confirm('检测到种子文件，是否上传并解析下载文件？');
     if (confirmed) {
@@ -166,17 +336,32 @@ const Dashboard = ({ user, onLogout }) => {
   const getStatusText = (status) => {
     switch (status) {
       case 'starting': return '准备中';
+      case 'queued': return '排队中';
+      case 'cancelled': return '已取消';
       case 'downloading': return '下载中';
+      case 'compressing': return '压缩中';
       case 'completed': return '已完成';
       case 'error': return '失败';
       default: return status;
     }
   };
 
+  const getTypeText = (type) => {
+    switch (type) {
+      case 'torrent': return '种子下载';
+      case 'ed2k': return 'ed2k下载';
+      case 'compress': return '后台压缩';
+      default: return type;
+    }
+  };
+
   const getStatusColor = (status) => {
     switch (status) {
       case 'starting': return '#ffc107';
+      case 'queued': return '#ffc107';
+      case 'cancelled': return '#6c757d';
       case 'downloading': return '#007bff';
+      case 'compressing': return '#17a2b8';
       case 'completed': return '#28a745';
       case 'error': return '#dc3545';
       default: return '#6c757d';
@@ -192,7 +377,7 @@ const Dashboard = ({ user, onLogout }) => {
             <div className="upload-methods">
               <div className="upload-method">
                 <h3>本地文件上传</h3>
-                <FileUpload onUpload={handleFileUpload} />
+                <FileUpload onUpload={handleLocalUploaded} />
               </div>
               <div className="upload-method">
                 <h3>种子文件上传</h3>
@@ -251,7 +436,7 @@ const Dashboard = ({ user, onLogout }) => {
                   <div key={download.id} className="download-item">
                     <div className="download-info">
                       <div className="download-filename">{download.filename}</div>
-                      <div className="download-type">{download.type === 'torrent' ? '种子下载' : 'ed2k下载'}</div>
+                      <div className="download-type">{getTypeText(download.type)}</div>
                     </div>
                     <div className="download-progress">
                       <div className="progress-bar">
@@ -272,6 +457,14 @@ const Dashboard = ({ user, onLogout }) => {
                       {download.error && (
                         <div className="error-message">{download.error}</div>
                       )}
+                      {download.type !== 'compress' && (
+                        <button
+                          className="btn btn-secondary btn-sm"
+                          onClick={() => handleCancelDownload(download)}
+                        >
+                          {['completed', 'error', 'cancelled'].includes(download.status) ? '移除' : '取消'}
+                        </button>
+                      )}
                     </div>
                   </div>
                 ))
@@ -280,21 +473,11 @@ const Dashboard = ({ user, onLogout }) => {
           </div>
         );
       case 'files':
-        return (
-          <div className="files-section">
-            <h2>文件列表</h2>
-            <FileList files={files} onDelete={fetchFiles} />
-          </div>
-        );
+        return renderFileList();
       case 'admin':
         return <AdminPanel />;
       default:
-        return (
-          <div className="files-section">
-            <h2>文件列表</h2>
-            <FileList files={files} onDelete={fetchFiles} />
-          </div>
-        );
+        return renderFileList();
     }
   };
 
@@ -0,0 +1,74 @@
+import io
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+
+# 应用在导入时创建上传目录并读取DATABASE_URL，测试使用独立的临时目录和数据库
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORK_DIR = tempfile.mkdtemp(prefix='netdisk-test-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(WORK_DIR, 'test.db')
+os.chdir(WORK_DIR)
+sys.path.insert(0, ROOT)
+
+import app as netdisk  # noqa: E402
+
+# 存储路径按UPLOAD_FOLDER保存，send_file会把相对路径解析到应用目录，测试中改用绝对路径
+netdisk.app.config['UPLOAD_FOLDER'] = os.path.join(WORK_DIR, 'uploads')
+
+
+@pytest.fixture(scope='session', autouse=True)
+def database():
+    netdisk.init_db()
+    yield
+
+
+@pytest.fixture
+def work_dir(tmp_path):
+    return str(tmp_path)
+
+
+@pytest.fixture
+def client():
+    return netdisk.app.test_client()
+
+
+@pytest.fixture
+def make_user(client):
+    """注册并登录一个新用户，返回(用户ID, 请求头)"""
+    count = [0]
+
+    def make(**fields):
+        count[0] += 1
+        name = f'user{os.getpid()}_{id(count)}_{count[0]}'
+        client.post('/api/register', json={'username': name, 'email': f'{name}@example.com', 'password': 'pw'})
+        data = client.post('/api/login', json={'username': name, 'password': 'pw'}).get_json()
+        if fields:
+            with netdisk.app.app_context():
+                netdisk.User.query.filter_by(id=data['user']['id']).update(fields)
+                netdisk.db.session.commit()
+        return data['user']['id'], {'Authorization': 'Bearer ' + data['token']}
+
+    return make
+
+
+@pytest.fixture
+def upload(client):
+    """普通上传并等待后台压缩完成，返回文件ID"""
+    def upload(headers, data, filename='data.bin'):
+        response = client.post('/api/upload', headers=headers,
+                               data={'file': (io.BytesIO(data), filename)}, content_type='multipart/form-data')
+        assert response.status_code == 200, response.get_json()
+        result = response.get_json()
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            job = client.get(f"/api/downloads/{result['download_id']}", headers=headers).get_json()
+            if job['status'] == 'completed':
+                return result['file_id']
+            assert job['status'] not in ('error', 'cancelled'), job
+            time.sleep(0.05)
+        pytest.fail('压缩任务超时')
+
+    return upload
@@ -0,0 +1,62 @@
+import time
+import uuid
+
+import pytest
+
+import app as netdisk
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = netdisk.AuthCache(100, 30)
+    monkeypatch.setattr(netdisk, 'auth_cache', cache)
+    monkeypatch.setitem(netdisk.app.config, 'AUTH_VERSION_CHECK_INTERVAL', 0.2)
+    return cache
+
+
+@pytest.fixture
+def state_reads(monkeypatch):
+    reads = []
+    original = netdisk.state_store.get
+
+    def get(key):
+        reads.append(key)
+        return original(key)
+
+    monkeypatch.setattr(netdisk.state_store, 'get', get)
+    return reads
+
+
+def test_hits_do_not_read_shared_state(client, make_user, cache, state_reads):
+    _, headers = make_user()
+    for _ in range(20):
+        assert client.get('/api/profile', headers=headers).status_code == 200
+    stats = cache.stats()
+    assert stats['hits'] == 19
+    assert stats['misses'] == 1
+    # 20个请求在一个检查间隔内，只读取一次失效纪元
+    assert state_reads.count(netdisk.AuthCache.EPOCH_KEY) == stats['epoch_checks'] == 1
+
+
+def test_invalidation_from_another_process(client, make_user, cache):
+    user_id, headers = make_user()
+    client.get('/api/profile', headers=headers)
+    with netdisk.app.app_context():
+        netdisk.User.query.filter_by(id=user_id).update({'storage_limit': 123})
+        netdisk.db.session.commit()
+        # 模拟其他进程修改配额后更新失效纪元
+        netdisk.state_store.set(netdisk.AuthCache.EPOCH_KEY, uuid.uuid4().hex)
+    time.sleep(0.25)
+    response = client.get('/api/profile', headers=headers)
+    assert response.get_json()['storage_limit'] == 123
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_stale_user_is_not_cached_after_invalidation(make_user, cache):
+    user_id, _ = make_user()
+    with netdisk.app.app_context():
+        user = netdisk.db.session.get(netdisk.User, user_id)
+        generation = cache.generation
+        cache.invalidate_user(user_id)
+        cache.put('token', user, time.time() + 60, generation)
+    assert cache.entries == {}
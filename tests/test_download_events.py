@@ -0,0 +1,111 @@
+import time
+import uuid
+
+import pytest
+
+import app as netdisk
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setitem(netdisk.app.config, 'SSE_REMOTE_POLL_INTERVAL', 0.1)
+    return netdisk.DownloadManager()
+
+
+@pytest.fixture
+def version_reads(monkeypatch):
+    reads = []
+    original = netdisk.state_store.get
+
+    def get(key):
+        if key == netdisk.REMOTE_VERSION_KEY:
+            reads.append(key)
+        return original(key)
+
+    monkeypatch.setattr(netdisk.state_store, 'get', get)
+    return reads
+
+
+def add_remote_job(user_id, status='downloading', progress=0):
+    """模拟其他进程执行的任务：写入任务表并更新任务更新标记"""
+    with netdisk.app.app_context():
+        job_id = str(uuid.uuid4())
+        netdisk.db.session.add(netdisk.DownloadJob(id=job_id, type='ed2k', filename='remote.bin', user_id=user_id,
+                                                   status=status, progress=progress, worker='other-worker'))
+        netdisk.db.session.commit()
+    netdisk.state_store.set(netdisk.REMOTE_VERSION_KEY, uuid.uuid4().hex)
+    return job_id
+
+
+def wait_for(predicate, timeout=3):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_one_poll_per_interval_regardless_of_connections(manager, version_reads):
+    subscribers = [manager.subscribe(user_id) for user_id in (1, 1, 2, 3)]
+    time.sleep(0.55)
+    # 4个连接共用一个轮询线程，约每0.1秒读取一次
+    assert 3 <= len(version_reads) <= 7
+    for subscriber in subscribers:
+        manager.unsubscribe(subscriber)
+    assert wait_for(lambda: not manager.poller_running)
+    count = len(version_reads)
+    time.sleep(0.3)
+    assert len(version_reads) == count
+
+
+def test_remote_updates_reach_subscribers(manager):
+    first, second = manager.subscribe(901), manager.subscribe(901)
+    other = manager.subscribe(902)
+    time.sleep(0.15)
+    job_id = add_remote_job(901)
+    assert wait_for(first.event.is_set) and wait_for(second.event.is_set)
+    assert [d['id'] for d in first.drain()] == [job_id]
+    assert [d['id'] for d in second.drain()] == [job_id]
+    assert other.drain() == []
+
+    # 标记变化但任务状态没变时不重复推送
+    netdisk.state_store.set(netdisk.REMOTE_VERSION_KEY, uuid.uuid4().hex)
+    time.sleep(0.3)
+    assert first.drain() == []
+    for subscriber in (first, second, other):
+        manager.unsubscribe(subscriber)
+
+
+def test_queue_stats_aggregate_all_processes(monkeypatch):
+    scheduler = netdisk.DownloadScheduler(2)
+    monkeypatch.setattr(scheduler, '_ensure_workers', lambda: None)
+    monkeypatch.setattr(netdisk.download_manager, 'update_progress', lambda *args, **kwargs: None)
+    scheduler.submit('local-job', 7, 5, print)
+    scheduler.publish_stats(register=True)
+    # 另一个进程发布的队列状态
+    other = 'other-host:1:abcd'
+    netdisk.state_store.set(f'worker:{other}', time.time(), ttl=60)
+    netdisk.state_store.set(f'queue:{other}', {
+        'workers': 4, 'running': 3, 'queued': 2, 'queued_by_user': [[7, 1], [8, 1]],
+        'oldest_enqueued_at': time.time() - 30, 'wait_sum': 10.0, 'wait_count': 4, 'max_wait': 6.0
+    }, ttl=60)
+    workers = netdisk.state_store.get(netdisk.QUEUE_WORKERS_KEY)
+    netdisk.state_store.set(netdisk.QUEUE_WORKERS_KEY, workers + [other])
+
+    stats = scheduler.stats()
+    assert stats['processes'] == 2
+    assert stats['workers'] == 6
+    assert stats['running'] == 3
+    assert stats['queued'] == 3
+    assert sorted((q['user_id'], q['queued']) for q in stats['queued_by_user']) == [(7, 2), (8, 1)]
+    assert stats['oldest_wait'] >= 30
+    assert stats['avg_wait'] == 2.5
+    assert stats['max_wait'] == 6.0
+
+    # 进程退出后心跳过期，下次登记时从列表中移除
+    netdisk.state_store.pop(f'worker:{other}')
+    netdisk.state_store.pop(f'queue:{other}')
+    scheduler.publish_stats(register=True)
+    assert other not in netdisk.state_store.get(netdisk.QUEUE_WORKERS_KEY)
+    assert scheduler.stats()['processes'] == 1
@@ -0,0 +1,176 @@
+import json
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import app as netdisk
+
+PART_SIZE = 1000
+
+
+class RangeServer:
+    """本地HTTP源：支持Range请求，可模拟返回错误数据或出错的源"""
+
+    def __init__(self, data, corrupt=False, broken=False):
+        self.data = data
+        self.corrupt = corrupt
+        self.broken = broken
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append(self.headers.get('Range'))
+                if server.broken:
+                    self.send_error(500)
+                    return
+                match = re.fullmatch(r'bytes=(\d+)-(\d+)', self.headers.get('Range', ''))
+                if not match:
+                    self.send_error(416)
+                    return
+                start, end = int(match.group(1)), int(match.group(2)) + 1
+                body = server.data[start:end]
+                if server.corrupt:
+                    body = bytes(b ^ 0xff for b in body)
+                self.send_response(206)
+                self.send_header('Content-Range', f'bytes {start}-{end - 1}/{len(server.data)}')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}/file'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def servers():
+    started = []
+
+    def start(data, **kwargs):
+        server = RangeServer(data, **kwargs)
+        started.append(server)
+        return server
+
+    yield start
+    for server in started:
+        server.close()
+
+
+@pytest.fixture(autouse=True)
+def small_parts(monkeypatch):
+    monkeypatch.setattr(netdisk, 'ED2K_PART_SIZE', PART_SIZE)
+
+
+def md4_hex(data):
+    h = netdisk.md4_new()
+    h.update(data)
+    return h.hexdigest()
+
+
+def make_link(data, sources, with_part_hashes=False):
+    parts = [data[i:i + PART_SIZE] for i in range(0, len(data), PART_SIZE)] or [b'']
+    part_hashes = [md4_hex(part) for part in parts]
+    root = netdisk.ed2k_root_hash(part_hashes, len(data))
+    link = f'ed2k://|file|test.bin|{len(data)}|{root}|'
+    if with_part_hashes:
+        link += 'p=' + ':'.join(part_hashes) + '|'
+    link += ''.join(f's={source}|' for source in sources)
+    return netdisk.parse_ed2k_link(link + '/')
+
+
+def download(info, work_dir):
+    temp_path = os.path.join(work_dir, 'temp_ed2k_test')
+    netdisk.Ed2kDownloader('ed2k-test', info, temp_path).run()
+    with open(temp_path, 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('message, expected', [
+    (b'', '31d6cfe0d16ae931b73c59d7e0c089c0'),
+    (b'abc', 'a448017aaf21d8525fc10ae87aa6729d'),
+    (b'12345678901234567890123456789012345678901234567890123456789012345678901234567890',
+     'e33b4ddc9c38f2199c3e7b164fcc0536'),
+])
+def test_md4_test_vectors(message, expected):
+    assert netdisk.MD4(message).hexdigest() == expected
+    assert md4_hex(message) == expected
+
+
+def test_parallel_download_from_multiple_sources(servers, work_dir):
+    data = os.urandom(PART_SIZE * 3 + 500)
+    good = servers(data)
+    bad = servers(data, broken=True)
+    info = make_link(data, [bad.url, good.url])
+
+    assert download(info, work_dir) == data
+    assert not os.path.exists(os.path.join(work_dir, 'temp_ed2k_test.parts'))
+    assert len(good.requests) == 4
+
+
+def test_file_of_exactly_one_part(servers, work_dir):
+    data = os.urandom(PART_SIZE)
+    info = make_link(data, [servers(data).url])
+
+    assert download(info, work_dir) == data
+
+
+def test_corrupt_part_is_fetched_from_another_source(servers, work_dir):
+    data = os.urandom(PART_SIZE * 2 + 10)
+    corrupt = servers(data, corrupt=True)
+    good = servers(data)
+    info = make_link(data, [corrupt.url, good.url], with_part_hashes=True)
+
+    assert download(info, work_dir) == data
+    assert corrupt.requests
+
+
+def test_root_hash_mismatch_without_part_hashes(servers, work_dir):
+    data = os.urandom(PART_SIZE * 2 + 10)
+    info = make_link(data, [servers(data, corrupt=True).url])
+
+    with pytest.raises(netdisk.Ed2kHashError):
+        download(info, work_dir)
+
+
+def test_resume_downloads_only_missing_parts(servers, work_dir):
+    data = os.urandom(PART_SIZE * 3)
+    server = servers(data)
+    info = make_link(data, [server.url])
+    temp_path = os.path.join(work_dir, 'temp_ed2k_test')
+    with open(temp_path, 'wb') as f:
+        f.write(data[:PART_SIZE] + b'\0' * (len(data) - PART_SIZE))
+    with open(temp_path + '.parts', 'w') as f:
+        json.dump({'0': md4_hex(data[:PART_SIZE])}, f)
+
+    assert download(info, work_dir) == data
+    assert sorted(server.requests) == [f'bytes={PART_SIZE}-{2 * PART_SIZE - 1}', f'bytes={2 * PART_SIZE}-{3 * PART_SIZE - 1}']
+
+
+def test_link_without_http_source_is_rejected(client, make_user, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(netdisk.download_scheduler, 'submit', lambda *args: submitted.append(args))
+    monkeypatch.setitem(netdisk.app.config, 'ED2K_HTTP_SOURCES', [])
+    _, headers = make_user()
+    link = 'ed2k://|file|test.bin|1000|31d6cfe0d16ae931b73c59d7e0c089c0|/|sources,10.0.0.1:4662|/'
+    response = client.post('/api/upload', headers=headers, data={'ed2k_link': link})
+    assert response.status_code == 400
+    assert 'HTTP下载源' in response.get_json()['error']
+    assert submitted == []
+
+    # 配置了镜像时同一链接可以下载
+    monkeypatch.setitem(netdisk.app.config, 'ED2K_HTTP_SOURCES', ['http://mirror.example.com/{hash}'])
+    response = client.post('/api/upload', headers=headers, data={'ed2k_link': link})
+    assert response.status_code == 200
+    assert len(submitted) == 1
+    netdisk.download_manager.remove_download(response.get_json()['download_id'])
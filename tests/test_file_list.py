@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import inspect, text
+
+import app as netdisk
+
+
+@pytest.fixture
+def listing(client, make_user):
+    """直接写入一批文件记录：原始大小有重复，存储大小与原始大小的顺序相反"""
+    user_id, headers = make_user()
+    sizes = [500, 100, 300, 100, 300, 100, 900]
+    base = datetime(2024, 1, 1)
+    with netdisk.app.app_context():
+        for index, size in enumerate(sizes):
+            netdisk.db.session.add(netdisk.File(
+                filename=f'f{index}.bin', original_filename=f'f{index}.bin', file_path=f'/nonexistent/{index}',
+                file_size=10000 - size, original_size=size, user_id=user_id,
+                created_at=base + timedelta(minutes=index % 3)))
+        netdisk.db.session.commit()
+
+    def fetch_all(sort, order, limit=2):
+        files, cursor = [], None
+        while True:
+            params = {'sort': sort, 'order': order, 'limit': limit}
+            if cursor:
+                params['cursor'] = cursor
+            data = client.get('/api/files', headers=headers, query_string=params).get_json()
+            files += data['files']
+            cursor = data['next_cursor']
+            if not cursor:
+                return files
+
+    fetch_all.headers = headers
+    return fetch_all
+
+
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+def test_size_sort_uses_original_size(listing, order):
+    files = listing('file_size', order, limit=100)
+    sizes = [f['original_size'] for f in files]
+    assert sizes == sorted(sizes, reverse=order == 'desc')
+
+
+@pytest.mark.parametrize('sort', ['created_at', 'filename', 'file_size'])
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+def test_pages_are_continuous_with_ties(listing, sort, order):
+    everything = listing(sort, order, limit=100)
+    paged = listing(sort, order, limit=2)
+    # 排序值相同的记录按id区分，翻页既不重复也不遗漏
+    assert [f['id'] for f in paged] == [f['id'] for f in everything]
+    assert len({f['id'] for f in paged}) == 7
+
+
+def test_invalid_cursor(client, listing):
+    headers = listing.headers
+    response = client.get('/api/files', headers=headers, query_string={'cursor': 'not-a-cursor'})
+    assert response.status_code == 400
+    cursor = client.get('/api/files', headers=headers,
+                        query_string={'sort': 'filename', 'limit': 1}).get_json()['next_cursor']
+    # 游标只能用于生成它的排序方式
+    response = client.get('/api/files', headers=headers, query_string={'sort': 'file_size', 'cursor': cursor})
+    assert response.status_code == 400
+
+
+def test_migration_backfills_original_size():
+    with netdisk.app.app_context():
+        engine = netdisk.db.engine
+        with engine.begin() as conn:
+            conn.execute(text('DROP INDEX ix_file_user_original_size'))
+            conn.execute(text('CREATE INDEX ix_file_user_size ON file (user_id, file_size, id)'))
+            conn.execute(text("DELETE FROM schema_version WHERE revision = '0009_file_original_size_sort'"))
+            user_id = conn.execute(text('SELECT id FROM user LIMIT 1')).scalar()
+            conn.execute(text("INSERT INTO file (filename, original_filename, file_path, file_size, user_id) "
+                              "VALUES ('old.bin', 'old.bin', '/nonexistent/old', 1234, :user_id)"),
+                         {'user_id': user_id})
+        assert netdisk.upgrade_db() == ['0009_file_original_size_sort']
+        indexes = {index['name'] for index in inspect(engine).get_indexes('file')}
+        assert 'ix_file_user_original_size' in indexes
+        assert 'ix_file_user_size' not in indexes
+        old = netdisk.File.query.filter_by(filename='old.bin').one()
+        assert old.original_size == 1234
+        netdisk.db.session.delete(old)
+        netdisk.db.session.commit()
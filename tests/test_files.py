@@ -0,0 +1,195 @@
+import hashlib
+import os
+
+import app as netdisk
+
+
+def blob_of(file_id):
+    with netdisk.app.app_context():
+        file = netdisk.db.session.get(netdisk.File, file_id)
+        return file.blob_id and netdisk.db.session.get(netdisk.Blob, file.blob_id)
+
+
+def blob_of_id(blob_id):
+    with netdisk.app.app_context():
+        return netdisk.db.session.get(netdisk.Blob, blob_id)
+
+
+def storage_used(user_id):
+    with netdisk.app.app_context():
+        return netdisk.db.session.get(netdisk.User, user_id).storage_used
+
+
+def content():
+    return os.urandom(64 * 1024)
+
+
+def test_duplicate_upload_shares_blob(client, make_user, upload):
+    data = content()
+    user_a, headers_a = make_user()
+    user_b, headers_b = make_user()
+    first = upload(headers_a, data)
+    second = upload(headers_b, data, 'copy.bin')
+    blob = blob_of(first)
+    assert blob.id == blob_of(second).id
+    assert blob.refcount == 2
+    assert storage_used(user_a) == storage_used(user_b) == blob.stored_size
+
+
+def test_deleting_last_reference_removes_blob(client, make_user, upload):
+    data = content()
+    user_a, headers_a = make_user()
+    user_b, headers_b = make_user()
+    first = upload(headers_a, data)
+    second = upload(headers_b, data)
+    blob = blob_of(first)
+
+    assert client.delete(f'/api/files/{first}', headers=headers_a).status_code == 200
+    assert blob_of(second).refcount == 1
+    assert storage_used(user_a) == 0
+
+    assert client.delete(f'/api/files/{second}', headers=headers_b).status_code == 200
+    assert storage_used(user_b) == 0
+    with netdisk.app.app_context():
+        assert netdisk.db.session.get(netdisk.Blob, blob.id) is None
+        assert netdisk.PendingRemoval.query.filter_by(path=blob.stored_path).count() == 1
+
+
+def test_batch_delete_of_shared_blob(client, make_user, upload):
+    data = content()
+    user_id, headers = make_user()
+    file_ids = [upload(headers, data, f'{i}.bin') for i in range(3)]
+    blob = blob_of(file_ids[0])
+    assert blob.refcount == 3
+    assert storage_used(user_id) == 3 * blob.stored_size
+
+    response = client.post('/api/files/batch_delete', headers=headers, json={'file_ids': file_ids})
+    assert response.get_json()['deleted'] == 3
+    assert storage_used(user_id) == 0
+    with netdisk.app.app_context():
+        assert netdisk.db.session.get(netdisk.Blob, blob.id) is None
+
+
+def test_delete_account_releases_shared_blobs(client, make_user, upload):
+    data = content()
+    owner, owner_headers = make_user()
+    other, other_headers = make_user()
+    kept = upload(other_headers, data)
+    upload(owner_headers, data)
+    only_owner = blob_of(upload(owner_headers, content()))
+
+    response = client.post('/api/delete_account', headers=owner_headers, json={'password': 'pw'})
+    assert response.status_code == 200
+    assert blob_of(kept).refcount == 1
+    with netdisk.app.app_context():
+        assert netdisk.db.session.get(netdisk.User, owner) is None
+        assert netdisk.db.session.get(netdisk.Blob, only_owner.id) is None
+
+
+def start_chunked_upload(client, headers):
+    response = client.post('/api/upload/init', headers=headers, json={'filename': 'big.bin', 'size': 10})
+    upload_id = response.get_json()['upload_id']
+    client.put(f'/api/upload/{upload_id}?offset=0', headers=headers, data=b'12345')
+    with netdisk.app.app_context():
+        return netdisk.db.session.get(netdisk.UploadSession, upload_id).staging_path
+
+
+def assert_session_removed(user_id, staging_path):
+    with netdisk.app.app_context():
+        assert netdisk.db.session.get(netdisk.User, user_id) is None
+        assert netdisk.UploadSession.query.filter_by(user_id=user_id).count() == 0
+        assert netdisk.PendingRemoval.query.filter_by(path=staging_path).count() == 1
+
+
+def test_delete_account_with_unfinished_upload(client, make_user):
+    user_id, headers = make_user()
+    staging_path = start_chunked_upload(client, headers)
+    response = client.post('/api/delete_account', headers=headers, json={'password': 'pw'})
+    assert response.status_code == 200
+    assert_session_removed(user_id, staging_path)
+
+
+def test_admin_delete_user_with_unfinished_upload(client, make_user):
+    _, admin_headers = make_user(is_admin=True)
+    user_id, headers = make_user()
+    staging_path = start_chunked_upload(client, headers)
+    response = client.post('/api/admin/delete_user', headers=admin_headers, json={'user_id': user_id})
+    assert response.status_code == 200
+    assert_session_removed(user_id, staging_path)
+
+
+def instant(client, headers, data, filename='instant.bin'):
+    return client.post('/api/upload/instant', headers=headers, json={
+        'filename': filename, 'size': len(data), 'sha256': hashlib.sha256(data).hexdigest()
+    }).get_json()
+
+
+def answer(client, headers, challenge, data):
+    proof = hashlib.sha256(data[challenge['offset']:challenge['offset'] + challenge['length']]).hexdigest()
+    return client.post(f"/api/upload/instant/{challenge['challenge']}", headers=headers, json={'proof': proof})
+
+
+def test_instant_upload_requires_range_proof(client, make_user, upload):
+    data = os.urandom(300 * 1024)
+    _, headers_a = make_user()
+    user_b, headers_b = make_user()
+    blob = blob_of(upload(headers_a, data))
+
+    challenge = instant(client, headers_b, data)
+    assert challenge['instant'] is False
+    assert challenge['length'] == netdisk.app.config['INSTANT_CHALLENGE_BYTES']
+    assert 0 <= challenge['offset'] <= len(data) - challenge['length']
+
+    response = answer(client, headers_b, challenge, data)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['instant'] is True
+    assert blob_of(body['file_id']).id == blob.id
+    assert blob_of(body['file_id']).refcount == 2
+    assert storage_used(user_b) == blob.stored_size
+    assert client.get(f"/api/files/{body['file_id']}/download", headers=headers_b).data == data
+
+
+def test_instant_upload_rejects_wrong_proof(client, make_user, upload):
+    data = content()
+    _, headers_a = make_user()
+    user_b, headers_b = make_user()
+    blob = blob_of(upload(headers_a, data))
+
+    challenge = instant(client, headers_b, data)
+    response = answer(client, headers_b, challenge, os.urandom(len(data)))
+    assert response.status_code == 400
+    assert blob_of_id(blob.id).refcount == 1
+    assert storage_used(user_b) == 0
+    # 题目只能回答一次
+    assert answer(client, headers_b, challenge, data).status_code == 404
+
+
+def test_instant_challenge_is_bound_to_user(client, make_user, upload):
+    data = content()
+    _, headers_a = make_user()
+    _, headers_b = make_user()
+    _, headers_c = make_user()
+    upload(headers_a, data)
+
+    challenge = instant(client, headers_b, data)
+    assert answer(client, headers_c, challenge, data).status_code == 404
+
+
+def test_instant_upload_of_unknown_content(client, make_user):
+    _, headers = make_user()
+    assert instant(client, headers, content()) == {'instant': False}
+
+
+def test_instant_upload_of_compressed_blob(client, make_user, upload, monkeypatch):
+    monkeypatch.setitem(netdisk.app.config, 'COMPRESS_BACKEND', 'seekable')
+    monkeypatch.setitem(netdisk.app.config, 'SEEKABLE_FRAME_SIZE', 64 * 1024)
+    data = b'netdisk instant upload ' * 20000
+    _, headers_a = make_user()
+    _, headers_b = make_user()
+    blob = blob_of(upload(headers_a, data, 'text.txt'))
+    assert blob.codec.startswith('seekable')
+
+    challenge = instant(client, headers_b, data, 'copy.txt')
+    assert answer(client, headers_b, challenge, data).get_json()['instant'] is True
+    assert blob_of_id(blob.id).refcount == 2
@@ -0,0 +1,37 @@
+import os
+
+import app as netdisk
+
+
+def share(client, headers, file_id, password=''):
+    response = client.post(f'/api/files/{file_id}/share', headers=headers, json={'password': password})
+    return response.get_json()['share_code']
+
+
+def test_share_password_is_not_accepted_in_url(client, make_user, upload):
+    _, headers = make_user()
+    code = share(client, headers, upload(headers, os.urandom(1000), 'movie.mp4'), 'secret')
+    assert client.get(f'/api/share/{code}/preview?password=secret').status_code == 401
+    assert client.post(f'/api/share/{code}/preview', json={'password': 'secret'}).status_code == 200
+
+
+def test_share_preview_token(client, make_user, upload):
+    _, headers = make_user()
+    data = os.urandom(1000)
+    file_id = upload(headers, data, 'movie.mp4')
+    code = share(client, headers, file_id, 'secret')
+    other = share(client, headers, upload(headers, os.urandom(1000), 'other.mp4'), 'secret')
+
+    assert client.post(f'/api/share/{code}/url_token', json={'password': 'wrong'}).status_code == 401
+    token = client.post(f'/api/share/{code}/url_token', json={'password': 'secret'}).get_json()['token']
+    response = client.get(f'/api/share/{code}/preview?token={token}')
+    assert response.status_code == 200
+    assert response.data == data
+    # 只能用于签发时的分享预览地址
+    assert client.get(f'/api/share/{other}/preview?token={token}').status_code == 401
+    assert client.get(f'/api/share/{code}/download?token={token}').status_code == 401
+    assert client.get('/api/profile', headers={'Authorization': 'Bearer ' + token}).status_code == 401
+
+    # 修改密码后已签发的token失效
+    share(client, headers, file_id, 'changed')
+    assert client.get(f'/api/share/{code}/preview?token={token}').status_code == 401
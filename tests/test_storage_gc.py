@@ -0,0 +1,28 @@
+import os
+
+import pytest
+
+import app as netdisk
+
+
+@pytest.fixture
+def upload_folder(tmp_path, monkeypatch):
+    monkeypatch.setitem(netdisk.app.config, 'UPLOAD_FOLDER', str(tmp_path))
+    monkeypatch.setitem(netdisk.app.config, 'STORAGE_GC_MIN_AGE', 0)
+    return tmp_path
+
+
+def make_old(path):
+    path.write_bytes(b'x')
+    os.utime(path, (0, 0))
+
+
+def test_placeholder_files_are_kept(upload_folder):
+    for name in ('test.txt', '.gitkeep', 'app.zip'):
+        make_old(upload_folder / name)
+    orphan = upload_folder / 'temp_orphan'
+    make_old(orphan)
+    with netdisk.app.app_context():
+        assert netdisk.collect_storage_garbage() == 1
+    assert not orphan.exists()
+    assert sorted(os.listdir(upload_folder)) == ['.gitkeep', 'app.zip', 'test.txt']
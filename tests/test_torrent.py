@@ -0,0 +1,253 @@
+import hashlib
+import io
+import os
+import socket
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import app as netdisk
+
+PIECE_LENGTH = 2 * netdisk.BT_BLOCK_SIZE
+
+
+def bencode(value):
+    if isinstance(value, int):
+        return b'i%de' % value
+    if isinstance(value, str):
+        value = value.encode()
+    if isinstance(value, bytes):
+        return b'%d:%s' % (len(value), value)
+    if isinstance(value, list):
+        return b'l' + b''.join(bencode(v) for v in value) + b'e'
+    return b'd' + b''.join(bencode(k) + bencode(value[k]) for k in sorted(value)) + b'e'
+
+
+class Seeder:
+    """本地做种peer：回应握手、发送完整的bitfield并响应块请求。
+    slow=True时每条piece消息先发一半，停顿超过下载端的1秒读取超时后再发剩余部分；
+    corrupt=True时发送错误数据"""
+
+    def __init__(self, content, info_hash, piece_count, slow=False, corrupt=False):
+        self.content = content
+        self.info_hash = info_hash
+        self.piece_count = piece_count
+        self.slow = slow
+        self.corrupt = corrupt
+        self.requested = []
+        self.listener = socket.create_server(('127.0.0.1', 0))
+        self.address = self.listener.getsockname()
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    @staticmethod
+    def _recv(conn, length):
+        data = b''
+        while len(data) < length:
+            chunk = conn.recv(length - len(data))
+            if not chunk:
+                raise ConnectionError
+            data += chunk
+        return data
+
+    def _serve(self, conn):
+        try:
+            handshake = self._recv(conn, 68)
+            if handshake[28:48] != self.info_hash:
+                return
+            conn.sendall(handshake[:28] + self.info_hash + b'-TEST00-' + b'0' * 12)
+            bitfield = bytearray((self.piece_count + 7) // 8)
+            for i in range(self.piece_count):
+                bitfield[i >> 3] |= 0x80 >> (i & 7)
+            conn.sendall(struct.pack('>IB', 1 + len(bitfield), 5) + bitfield)
+            conn.sendall(struct.pack('>IB', 1, 1))  # unchoke
+            while True:
+                length = struct.unpack('>I', self._recv(conn, 4))[0]
+                if not length:
+                    continue
+                payload = self._recv(conn, length)
+                if payload[0] != 6:
+                    continue
+                index, begin, size = struct.unpack('>III', payload[1:])
+                self.requested.append(index)
+                block = self.content[index * PIECE_LENGTH + begin:index * PIECE_LENGTH + begin + size]
+                if self.corrupt:
+                    block = bytes(b ^ 0xff for b in block)
+                message = struct.pack('>IBII', 9 + len(block), 7, index, begin) + block
+                if self.slow:
+                    half = len(message) // 2
+                    conn.sendall(message[:half])
+                    time.sleep(1.5)
+                    conn.sendall(message[half:])
+                else:
+                    conn.sendall(message)
+        except (ConnectionError, OSError, struct.error):
+            pass
+        finally:
+            conn.close()
+
+    def close(self):
+        self.listener.close()
+
+
+class Tracker:
+    """本地HTTP tracker，按compact格式返回配置的peer列表"""
+
+    def __init__(self):
+        self.peers = []
+        self.announces = 0
+        tracker = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                tracker.announces += 1
+                compact = b''.join(socket.inet_aton(host) + struct.pack('>H', port) for host, port in tracker.peers)
+                body = bencode({'interval': 1800, 'peers': compact})
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}/announce'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def swarm(tmp_path, monkeypatch):
+    """生成多文件种子、本地tracker，并按需启动seeder"""
+    monkeypatch.setitem(netdisk.app.config, 'TORRENT_ANNOUNCE_ROUNDS', 1)
+    monkeypatch.setitem(netdisk.app.config, 'TORRENT_PEERS', [])
+    files = [('a.bin', os.urandom(PIECE_LENGTH + 1000)), ('b.bin', os.urandom(PIECE_LENGTH // 2))]
+    content = b''.join(data for _, data in files)
+    pieces = b''.join(hashlib.sha1(content[i:i + PIECE_LENGTH]).digest() for i in range(0, len(content), PIECE_LENGTH))
+    info = {
+        'name': 'test',
+        'piece length': PIECE_LENGTH,
+        'pieces': pieces,
+        'files': [{'length': len(data), 'path': [name]} for name, data in files],
+    }
+    tracker = Tracker()
+    torrent_path = tmp_path / 'test.torrent'
+    torrent_path.write_bytes(bencode({'announce': tracker.url, 'info': info}))
+    meta = netdisk.parse_torrent(str(torrent_path))
+    seeders = []
+
+    class Swarm:
+        def seed(self, **kwargs):
+            seeder = Seeder(content, meta['info_hash'], len(meta['piece_hashes']), **kwargs)
+            seeders.append(seeder)
+            tracker.peers.append(seeder.address)
+            return seeder
+
+        def download(self):
+            download_dir = str(tmp_path / 'download')
+            netdisk.TorrentDownloader('torrent-test', meta, download_dir).run()
+            return {name: (tmp_path / 'download' / name).read_bytes() for name, _ in files}
+
+    swarm = Swarm()
+    swarm.files = dict(files)
+    swarm.meta = meta
+    swarm.tracker = tracker
+    swarm.state_path = str(tmp_path / 'download.pieces')
+    yield swarm
+    for seeder in seeders:
+        seeder.close()
+    tracker.close()
+
+
+def test_peer_wire_keeps_partial_message_across_timeouts():
+    a, b = socket.socketpair()
+    try:
+        a.settimeout(0.2)
+        wire = netdisk.PeerWire(a, netdisk.BT_BLOCK_SIZE + 13)
+        block = os.urandom(netdisk.BT_BLOCK_SIZE)
+        message = struct.pack('>IBII', 9 + len(block), 7, 0, 0) + block
+        b.sendall(message[:len(message) // 2])
+        with pytest.raises(socket.timeout):
+            wire.read_message()
+        b.sendall(message[len(message) // 2:] + struct.pack('>I', 0))
+        assert wire.read_message() == (7, message[5:])
+        assert wire.read_message() == (None, b'')
+    finally:
+        a.close()
+        b.close()
+
+
+def test_download_from_local_swarm(swarm):
+    swarm.seed()
+    swarm.seed()
+
+    assert swarm.download() == swarm.files
+    assert swarm.tracker.announces == 1
+    assert not os.path.exists(swarm.state_path)
+
+
+def test_slow_peer_splitting_messages(swarm):
+    swarm.seed(slow=True)
+
+    assert swarm.download() == swarm.files
+
+
+def test_corrupt_peer_does_not_poison_download(swarm):
+    bad = swarm.seed(corrupt=True)
+    swarm.seed()
+
+    assert swarm.download() == swarm.files
+    assert bad.requested
+
+
+def test_resume_downloads_only_missing_pieces(swarm, tmp_path):
+    download_dir = tmp_path / 'download'
+    download_dir.mkdir()
+    content = b''.join(swarm.files.values())
+    offset = 0
+    for name, data in swarm.files.items():
+        # 第一个分片已下载并记录，其余位置是空洞
+        kept = content[:PIECE_LENGTH][offset:offset + len(data)]
+        (download_dir / name).write_bytes(kept + b'\0' * (len(data) - len(kept)))
+        offset += len(data)
+    with open(swarm.state_path, 'w') as f:
+        f.write('[0]')
+    seeder = swarm.seed()
+
+    assert swarm.download() == swarm.files
+    assert 0 not in seeder.requested
+
+
+def test_same_torrent_name_uses_separate_files(client, make_user, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(netdisk.download_scheduler, 'submit', lambda *args: submitted.append(args))
+    _, headers = make_user()
+    info = {'name': 'x.bin', 'piece length': PIECE_LENGTH, 'length': 10, 'pieces': hashlib.sha1(b'x').digest()}
+    torrent = bencode({'announce': 'http://127.0.0.1:9/announce', 'info': info})
+    for _ in range(2):
+        response = client.post('/api/upload', headers=headers, content_type='multipart/form-data',
+                               data={'torrent_file': (io.BytesIO(torrent), 'same.torrent')})
+        assert response.status_code == 200
+    sources = [args[5] for args in submitted]
+    assert len(set(sources)) == 2
+    assert all(os.path.exists(path) for path in sources)
+    # 先结束的任务删除自己的种子文件，不影响另一个任务
+    os.remove(sources[0])
+    assert os.path.exists(sources[1])
+    for args in submitted:
+        netdisk.download_manager.remove_download(args[0])
+    os.remove(sources[1])
@@ -0,0 +1,5 @@
+# 生产环境入口：gunicorn -c gunicorn.conf.py wsgi:app
+# 数据库表由gunicorn主进程创建，后台服务在每个worker启动后开启（见gunicorn.conf.py）
+from app import create_app
+
+app = create_app()